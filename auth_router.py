@@ -5,8 +5,9 @@ from auth import hash_password, verify_password, create_access_token
 from schemas import UserOut, UserRegister, TokenOut, UserLogin
 from models import User, Role
 from deps import get_db, get_current_user
+from profiling import ProfilingRoute
 
-router = APIRouter(prefix="/api/auth", tags=["auth"])
+router = APIRouter(prefix="/api/auth", tags=["auth"], route_class=ProfilingRoute)
 
 
 @router.post("/register", response_model=UserOut, status_code=status.HTTP_201_CREATED)
@@ -0,0 +1,87 @@
+"""Compare the eager "my orders" listing with the summary endpoint.
+
+    python benchmarks/bench_order_summary.py --orders 5000 --items 3
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from database import Base
+from models import Order, OrderItem, Product, User, Role
+from routers.orders_router import list_orders, my_order_summary
+from schemas import OrderOut, OrderSummaryOut
+from summaries import rebuild_summaries
+
+
+def seed(db, n_orders, n_items):
+    user = User(email="buyer@example.com", password_hash="x", role=Role.user)
+    db.add(user)
+    db.add(Product(id=1, name="Widget", slug="widget", sku="W-1", price=2.5, qty_in_stock=10 ** 9))
+    db.flush()
+
+    start = datetime(2024, 1, 1)
+    db.execute(insert(Order), [
+        {"id": i, "user_id": user.id, "total": 2.5 * n_items, "created_at": start + timedelta(minutes=i)}
+        for i in range(1, n_orders + 1)
+    ])
+    db.execute(insert(OrderItem), [
+        {"order_id": i, "product_id": 1, "qty": 1, "unit_price": 2.5, "line_total": 2.5}
+        for i in range(1, n_orders + 1) for _ in range(n_items)
+    ])
+    db.commit()
+    rebuild_summaries(db)
+    return user
+
+
+def timed(label, fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    print(f"{label:<28} {best * 1000:9.2f} ms")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=5000)
+    parser.add_argument("--items", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+    with Session() as db:
+        user_id = seed(db, args.orders, args.items).id
+    print(f"{args.orders} orders x {args.items} items")
+
+    # a fresh session per call so the identity map never serves cached rows
+    def eager():
+        with Session() as db:
+            user = db.get(User, user_id)
+            orders = list_orders(db=db, current_user=user, fields=None)
+            [OrderOut.model_validate(order) for order in orders]
+
+    def summary():
+        with Session() as db:
+            user = db.get(User, user_id)
+            OrderSummaryOut.model_validate(my_order_summary(recent=5, db=db, current_user=user))
+
+    slow = timed("list_orders (eager items)", eager, args.repeat)
+    fast = timed("orders/summary", summary, args.repeat)
+    print(f"speedup: {slow / fast:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
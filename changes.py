@@ -0,0 +1,127 @@
+"""Change-data-capture outbox for products, orders and customers.
+
+Every flush that inserts, updates or deletes one of those rows appends a
+``change_events`` row in the same transaction, so the feed never shows a
+change that was rolled back. Set-based UPDATEs bypass the flush and call
+``record_changes`` themselves. Events carry the full row (or None for a
+delete), which lets ``python changes.py compact`` drop superseded events.
+"""
+import argparse
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import delete, event, exists, insert, inspect, select
+from sqlalchemy.orm import Session, aliased
+
+from models import ChangeEvent, Customer, Order, Product
+
+TRACKED = {
+    Product: "product",
+    Order: "order",
+    Customer: "customer",
+}
+
+
+def snapshot(obj) -> dict:
+    mapper = inspect(obj).mapper
+    return jsonable_encoder({attr.key: getattr(obj, attr.key) for attr in mapper.column_attrs})
+
+
+def _event_row(obj, op: str, now: datetime) -> dict:
+    return {
+        "entity": TRACKED[type(obj)],
+        "entity_id": obj.id,
+        "op": op,
+        "data": None if op == "delete" else snapshot(obj),
+        "created_at": now,
+    }
+
+
+def record_changes(db: Session, op: str, objs: Iterable):
+    """Append events for rows changed outside the unit of work (bulk UPDATEs)."""
+    now = datetime.utcnow()
+    rows = [_event_row(obj, op, now) for obj in objs]
+    if rows:
+        db.execute(insert(ChangeEvent), rows)
+
+
+@event.listens_for(Session, "after_flush")
+def _capture_flush(session, flush_context):
+    now = datetime.utcnow()
+    rows = []
+    for op, objs in (("create", session.new), ("update", session.dirty), ("delete", session.deleted)):
+        for obj in objs:
+            if type(obj) not in TRACKED:
+                continue
+            if op == "update" and not session.is_modified(obj, include_collections=False):
+                continue
+            rows.append(_event_row(obj, op, now))
+    if rows:
+        rows.sort(key=lambda row: (row["entity"], row["entity_id"]))
+        session.connection().execute(insert(ChangeEvent), rows)
+
+
+def fetch_changes(db: Session, since: int, limit: int, entity: Optional[str] = None) -> List[ChangeEvent]:
+    query = select(ChangeEvent).where(ChangeEvent.id > since)
+    if entity:
+        query = query.where(ChangeEvent.entity == entity)
+    return db.scalars(query.order_by(ChangeEvent.id).limit(limit)).all()
+
+
+def compact_changes(db: Session, retention: timedelta,
+                    tombstone_retention: Optional[timedelta] = None) -> int:
+    """Drop events older than ``retention`` that a newer event for the same row supersedes.
+
+    Delete events are kept until ``tombstone_retention`` (forever if None).
+    Returns the number of events removed.
+    """
+    now = datetime.utcnow()
+    newer = aliased(ChangeEvent)
+    superseded = exists().where(
+        newer.entity == ChangeEvent.entity,
+        newer.entity_id == ChangeEvent.entity_id,
+        newer.id > ChangeEvent.id,
+    )
+    removed = db.execute(
+        delete(ChangeEvent).where(ChangeEvent.created_at < now - retention, superseded)
+    ).rowcount
+
+    if tombstone_retention is not None:
+        removed += db.execute(
+            delete(ChangeEvent).where(
+                ChangeEvent.op == "delete",
+                ChangeEvent.created_at < now - tombstone_retention,
+            )
+        ).rowcount
+
+    db.commit()
+    return removed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Maintain the change event outbox")
+    parser.add_argument("command", choices=["compact"])
+    parser.add_argument("--days", type=float, default=7, help="keep every event newer than this")
+    parser.add_argument("--tombstone-days", type=float, default=None,
+                        help="drop delete events older than this (default: keep)")
+    args = parser.parse_args(argv)
+
+    from database import SessionLocal, engine
+    from migrations import prepare_database
+
+    prepare_database(engine)
+    db = SessionLocal()
+    try:
+        removed = compact_changes(
+            db,
+            timedelta(days=args.days),
+            timedelta(days=args.tombstone_days) if args.tombstone_days is not None else None,
+        )
+    finally:
+        db.close()
+    print(f"Removed {removed} change events")
+
+
+if __name__ == "__main__":
+    main()
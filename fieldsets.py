@@ -0,0 +1,48 @@
+from typing import Dict, Iterable, List, Optional, Type
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy.orm import load_only
+
+
+def parse_fields(fields: Optional[str], schema: Type[BaseModel]) -> Optional[List[str]]:
+    """Parse a ``?fields=a,b,c`` sparse fieldset against the output schema.
+
+    Returns None when no fieldset was requested (full representation).
+    """
+    if not fields:
+        return None
+
+    requested = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    if not requested:
+        raise HTTPException(status_code=400, detail="No fields requested")
+    unknown = [f for f in requested if f not in schema.model_fields]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    if "id" not in requested:
+        requested.insert(0, "id")
+    return requested
+
+
+def load_columns(model, fields: List[str]):
+    """``load_only`` option restricting the SELECT to the requested columns."""
+    columns = model.__table__.columns.keys()
+    return load_only(*[getattr(model, f) for f in fields if f in columns])
+
+
+def sparse_response(rows: Iterable, fields: List[str],
+                    nested: Optional[Dict[str, Type[BaseModel]]] = None) -> JSONResponse:
+    """Serialize only ``fields`` of each row, bypassing the full response model."""
+    nested = nested or {}
+    data = []
+    for row in rows:
+        item = {}
+        for f in fields:
+            value = getattr(row, f)
+            if f in nested:
+                value = [nested[f].model_validate(v) for v in value]
+            item[f] = value
+        data.append(item)
+    return JSONResponse(jsonable_encoder(data))
@@ -1,15 +1,55 @@
+import os
+from contextlib import asynccontextmanager
+
+import anyio.to_thread
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from database import Base, engine
+from sqlalchemy import text
+
+from auth import hash_password
+from database import engine
+from migrations import prepare_database
+from compression import CompressionMiddleware
+from profiling import ProfilingMiddleware, sampler
 
 from auth_router import router as auth_router
 from routers.products_router import router as products_router
 from routers.customers_router import router as customers_router
 from routers.orders_router import router as orders_router
+from routers.changes_router import router as changes_router
+from routers.profiling_router import router as profiling_router
+
+# Size of the AnyIO threadpool that runs the sync route handlers (AnyIO default: 40).
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", "40"))
+# Start the per-route stack sampler with the app (see profiling.py).
+PROFILE_SAMPLING = os.getenv("PROFILE_SAMPLING", "") == "1"
+
 
-Base.metadata.create_all(bind=engine)
+def warm_up():
+    """Create and migrate the schema, open the pooled DB connections and load the
+    bcrypt backend before traffic arrives."""
+    prepare_database(engine)
+    pool_size = engine.pool.size() if hasattr(engine.pool, "size") else 1
+    connections = [engine.connect() for _ in range(pool_size)]
+    for conn in connections:
+        conn.execute(text("SELECT 1"))
+        conn.close()
+    hash_password("warm-up")
 
-app = FastAPI(title="MiniERP API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    await anyio.to_thread.run_sync(warm_up)
+    if PROFILE_SAMPLING:
+        sampler.start()
+    yield
+    sampler.stop()
+    # uvicorn has already drained in-flight requests at this point
+    engine.dispose()
+
+
+app = FastAPI(title="MiniERP API", lifespan=lifespan)
 
 # ---------------- CORS Middleware ----------------
 origins = [
@@ -24,6 +64,9 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(ProfilingMiddleware)
 # -------------------------------------------------
 
 
@@ -31,3 +74,5 @@ app.include_router(auth_router)
 app.include_router(products_router)
 app.include_router(customers_router)
 app.include_router(orders_router)
+app.include_router(changes_router)
+app.include_router(profiling_router)
@@ -0,0 +1,105 @@
+"""Schema creation and data migrations for SQLite databases.
+
+    python migrations.py
+
+Applied migrations are tracked in ``PRAGMA user_version``, so running this
+again is a no-op. Every entry point (app startup, ``serve.py`` and the CLIs)
+calls ``prepare_database`` before touching data.
+"""
+from sqlalchemy import inspect
+
+MONEY_COLUMNS = {
+    "products": ["price"],
+    "orders": ["total"],
+    "order_items": ["unit_price", "line_total"],
+    "user_order_summaries": ["lifetime_total"],
+}
+
+
+def migrate_money_to_minor_units(conn):
+    """Rewrite legacy Float amounts (e.g. 19.99) as integer cents (1999).
+
+    Only columns still declared FLOAT/REAL are touched; databases created with
+    the Money type already store cents. The column affinity stays REAL, which
+    holds integral cents exactly and is read back through ``money.from_minor``.
+    """
+    inspector = inspect(conn)
+    tables = set(inspector.get_table_names())
+    for table, columns in MONEY_COLUMNS.items():
+        if table not in tables:
+            continue
+        declared = {c["name"]: str(c["type"]).upper() for c in inspector.get_columns(table)}
+        legacy = [c for c in columns if declared.get(c, "").startswith(("FLOAT", "REAL"))]
+        if legacy:
+            assignments = ", ".join(f"{c} = CAST(ROUND({c} * 100) AS INTEGER)" for c in legacy)
+            conn.exec_driver_sql(f"UPDATE {table} SET {assignments}")
+
+
+def backfill_order_summaries(conn):
+    """Fill ``user_order_summaries`` for orders placed before the table existed."""
+    from summaries import recompute_summaries
+
+    tables = set(inspect(conn).get_table_names())
+    if {"orders", "user_order_summaries"} <= tables:
+        recompute_summaries(conn)
+
+
+MIGRATIONS = [
+    migrate_money_to_minor_units,
+    backfill_order_summaries,
+]
+
+
+def _begin_exclusive(conn):
+    # BEGIN IMMEDIATE takes SQLite's write lock before user_version is read, so
+    # concurrently starting workers apply each migration exactly once.
+    conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def _apply_pending(conn) -> int:
+    version = conn.exec_driver_sql("PRAGMA user_version").scalar()
+    pending = MIGRATIONS[version:]
+    for migration in pending:
+        migration(conn)
+    conn.exec_driver_sql(f"PRAGMA user_version = {len(MIGRATIONS)}")
+    return len(pending)
+
+
+def run_migrations(engine) -> int:
+    """Apply pending migrations in one transaction; returns how many ran."""
+    with engine.connect() as conn:
+        _begin_exclusive(conn)
+        applied = _apply_pending(conn)
+        conn.commit()
+    return applied
+
+
+def prepare_database(engine) -> int:
+    """Create missing tables and indexes, then apply pending migrations.
+
+    Runs in a single locked transaction, so it is safe to call from every worker.
+    """
+    from database import Base
+    import models  # noqa: F401 (registers the tables)
+
+    with engine.connect() as conn:
+        _begin_exclusive(conn)
+        Base.metadata.create_all(bind=conn)
+        # create_all skips indexes on tables that already exist
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=conn, checkfirst=True)
+        applied = _apply_pending(conn)
+        conn.commit()
+    return applied
+
+
+def main():
+    from database import engine
+
+    applied = prepare_database(engine)
+    print(f"Applied {applied} migration(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,9 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, Enum, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, Enum, ForeignKey, DateTime, Index, JSON
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from enum import Enum as PyEnum
 from database import Base
+from money import Money
 
 class Role(PyEnum):
     admin = "admin"
@@ -22,7 +23,7 @@ class Product(Base):
     name = Column(String, nullable=False)
     slug = Column(String, unique=True, index=True)
     sku = Column(String, unique=True, nullable=False)
-    price = Column(Float, nullable=False)
+    price = Column(Money, nullable=False)
     qty_in_stock = Column(Integer, nullable=False)
     is_active = Column(Boolean, default=True)
 
@@ -43,32 +44,66 @@ class OrderStatus(PyEnum):
     shipped = "SHIPPED"
     canceled = "CANCELED"
 
+
+# Allowed order status transitions; SHIPPED and CANCELED are terminal.
+ORDER_TRANSITIONS = {
+    OrderStatus.new: {OrderStatus.paid, OrderStatus.canceled},
+    OrderStatus.paid: {OrderStatus.shipped, OrderStatus.canceled},
+    OrderStatus.shipped: set(),
+    OrderStatus.canceled: set(),
+}
+
 class Order(Base):
     __tablename__ = "orders"
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     customer_id = Column(Integer, ForeignKey("customers.id"), nullable=True)
     status = Column(Enum(OrderStatus), default=OrderStatus.new)
-    total = Column(Float, default=0)
+    total = Column(Money, default=0)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     user = relationship("User", backref="orders")
     customer = relationship("Customer", backref="orders")
     items = relationship("OrderItem", back_populates="order", cascade="all, delete")
 
+    __table_args__ = (Index("ix_orders_user_created", "user_id", "created_at"),)
+
 
 class OrderItem(Base):
     __tablename__ = "order_items"
     id = Column(Integer, primary_key=True)
-    order_id = Column(Integer, ForeignKey("orders.id"))
+    order_id = Column(Integer, ForeignKey("orders.id"), index=True)
     product_id = Column(Integer, ForeignKey("products.id"))
     qty = Column(Integer, nullable=False)
-    unit_price = Column(Float, nullable=False)
-    line_total = Column(Float, nullable=False)
+    unit_price = Column(Money, nullable=False)
+    line_total = Column(Money, nullable=False)
 
     order = relationship("Order", back_populates="items")
     product = relationship("Product")
 
 
+class UserOrderSummary(Base):
+    """Per-user order projection, kept in step with ``orders`` by ``summaries``."""
+    __tablename__ = "user_order_summaries"
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    order_count = Column(Integer, nullable=False, default=0)
+    lifetime_total = Column(Money, nullable=False, default=0)
+    last_order_at = Column(DateTime, nullable=True)
 
 
+class ChangeEvent(Base):
+    """Transactional outbox row; ``id`` is the cursor of the change feed."""
+    __tablename__ = "change_events"
+    id = Column(Integer, primary_key=True)
+    entity = Column(String, nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    op = Column(String, nullable=False)
+    data = Column(JSON, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_change_events_entity_key", "entity", "entity_id", "id"),
+        Index("ix_change_events_entity_cursor", "entity", "id"),
+        # never reuse ids after compaction, cursors must stay monotonic
+        {"sqlite_autoincrement": True},
+    )
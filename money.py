@@ -0,0 +1,41 @@
+from decimal import Decimal, ROUND_HALF_UP
+
+from sqlalchemy import Integer
+from sqlalchemy.types import TypeDecorator
+
+CENT = Decimal("0.01")
+MINOR_UNITS = 100
+
+
+def to_minor(amount) -> int:
+    """Decimal/float/str amount -> integer minor units (cents), rounding half up."""
+    if not isinstance(amount, Decimal):
+        # str() first so 0.1 becomes Decimal("0.1"), not its binary expansion
+        amount = Decimal(str(amount))
+    return int((amount * MINOR_UNITS).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def from_minor(minor) -> Decimal:
+    """Integer minor units -> Decimal amount with two places."""
+    # legacy REAL columns hand back floats such as 250.0
+    return (Decimal(int(round(minor))) / MINOR_UNITS).quantize(CENT)
+
+
+class Money(TypeDecorator):
+    """Monetary amount exposed as ``Decimal`` and stored as integer cents.
+
+    SUM() and comparisons run on exact integers in the database, and the result
+    type of ``func.sum(Money column)`` is Money again.
+    """
+    impl = Integer
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return to_minor(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return from_minor(value)
@@ -0,0 +1,542 @@
+"""Request profiling for admins.
+
+Two modes:
+
+* Per-request capture: send ``X-Profile: 1`` (or ``?profile=1``) with the
+  bearer token of an active admin (looked up in the database, not just the
+  token's role claim). The request runs under cProfile (``pyinstrument`` when asked
+  for and installed), the response carries ``X-Profile-Id`` and the artifact
+  is downloaded from ``/api/profiling/profiles/{id}``. Artifacts are written
+  to ``PROFILE_DIR`` so any worker process can serve the download; the
+  directory is created with mode 0700 and refused if another user owns it
+  or can access it.
+* Sampling: a background thread snapshots every thread's stack at a fixed
+  interval and aggregates the stacks per route over a rolling time window.
+  The samples live in the worker process that started the sampler, so the
+  ``/sampling`` endpoints are only meaningful with a single worker (or with
+  ``PROFILE_SAMPLING=1``, which ``serve.py`` runs with one worker).
+
+``ProfilingRoute`` tags the worker thread of sync route handlers with the
+route for the sampler; they stay on FastAPI's stock sync path, so response
+validation (and the lazy loads it triggers) runs in the threadpool as well.
+Only while a capture is active does a request go through a second handler,
+which runs the endpoint in the threadpool itself, profiling that thread
+(before Python 3.12 a profiler started by the middleware cannot see it), and
+validates the response on the event loop thread, inside the middleware's
+profiler. From 3.12 cProfile hooks ``sys.monitoring``, which is process-wide:
+the middleware's profiler already sees every thread and a second one cannot
+be enabled, so worker threads are only tagged.
+"""
+import contextvars
+import cProfile
+import dataclasses
+import functools
+import inspect
+import io
+import json
+import marshal
+import os
+import pstats
+import re
+import stat
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from fastapi.routing import APIRoute
+from starlette.datastructures import Headers, MutableHeaders, QueryParams
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from auth import decode_token
+from database import get_db
+from models import Role, User
+
+try:
+    from pyinstrument import Profiler as PyinstrumentProfiler
+except ImportError:  # optional dependency
+    PyinstrumentProfiler = None
+
+MAX_STORED_PROFILES = 20
+PROFILE_DIR = os.getenv("PROFILE_DIR") or os.path.join(tempfile.gettempdir(), "minierp-profiles")
+SAMPLE_INTERVAL = 0.01
+SAMPLE_WINDOW = 60.0
+MAX_STACK_DEPTH = 64
+
+_PROFILE_ID = re.compile(r"^\d+-[0-9a-f]{12}$")
+
+# one cProfile per thread before 3.12; afterwards one per process (sys.monitoring)
+PER_THREAD_PROFILERS = sys.version_info < (3, 12)
+
+_current_capture: contextvars.ContextVar = contextvars.ContextVar("profile_capture", default=None)
+_thread_routes: Dict[int, str] = {}
+
+
+# ---------- per-request capture ----------
+
+class ProfileArtifact:
+    def __init__(self, profile_id: str, kind: str, method: str, path: str,
+                 created_at: Optional[datetime] = None, duration_ms: float = 0.0):
+        self.id = profile_id
+        self.kind = kind
+        self.method = method
+        self.path = path
+        self.created_at = created_at or datetime.utcnow()
+        self.duration_ms = duration_ms
+        self.content = b""
+        self.text = ""
+
+    @property
+    def filename(self) -> str:
+        return f"profile-{self.id}.{'html' if self.kind == 'pyinstrument' else 'prof'}"
+
+    @property
+    def media_type(self) -> str:
+        return "text/html" if self.kind == "pyinstrument" else "application/octet-stream"
+
+    def meta(self) -> dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "method": self.method,
+            "path": self.path,
+            "created_at": self.created_at.isoformat(),
+            "duration_ms": self.duration_ms,
+        }
+
+
+def new_profile_id() -> str:
+    # the pid tells which worker served the profiled request
+    return f"{os.getpid()}-{uuid.uuid4().hex[:12]}"
+
+
+class ProfileStore:
+    """Most recent captures, kept in a directory that every worker process shares.
+
+    A request and the download of its profile usually reach different workers,
+    so the artifacts can't live in process memory. Bounded so profiling can't
+    grow disk usage without limit.
+    """
+
+    def __init__(self, directory: str = PROFILE_DIR, size: int = MAX_STORED_PROFILES):
+        self.directory = directory
+        self.size = size
+
+    def _path(self, profile_id: str, suffix: str) -> str:
+        return os.path.join(self.directory, f"{profile_id}.{suffix}")
+
+    def _verify(self):
+        # profiles expose code paths and timings, and the default location is
+        # under the shared temp dir: refuse a directory someone else controls
+        st = os.lstat(self.directory)
+        owned = not hasattr(os, "getuid") or st.st_uid == os.getuid()
+        if not stat.S_ISDIR(st.st_mode) or not owned or st.st_mode & 0o077:
+            raise PermissionError(
+                f"Profile directory {self.directory} must be a directory owned by this user with mode 0700"
+            )
+
+    def prepare(self):
+        """Create the directory (private to this user) if needed and check it."""
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        self._verify()
+
+    def add(self, artifact: ProfileArtifact):
+        self.prepare()
+        with open(self._path(artifact.id, "data"), "wb") as f:
+            f.write(artifact.content)
+        with open(self._path(artifact.id, "txt"), "w") as f:
+            f.write(artifact.text)
+        # the metadata goes last and atomically: a listed profile is complete
+        tmp = self._path(artifact.id, "json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(artifact.meta(), f)
+        os.replace(tmp, self._path(artifact.id, "json"))
+        self._prune()
+
+    def _prune(self):
+        for profile_id in self._ids()[self.size:]:
+            for suffix in ("json", "data", "txt"):
+                try:
+                    os.remove(self._path(profile_id, suffix))
+                except FileNotFoundError:
+                    pass  # pruned by another worker
+
+    def _ids(self) -> List[str]:
+        """Stored profile ids, newest first."""
+        try:
+            self._verify()
+            names = [n for n in os.listdir(self.directory) if n.endswith(".json")]
+        except FileNotFoundError:
+            return []
+        entries = []
+        for name in names:
+            try:
+                with open(os.path.join(self.directory, name)) as f:
+                    entries.append((json.load(f)["created_at"], name[:-5]))
+            except FileNotFoundError:
+                continue  # pruned by another worker
+        return [profile_id for _, profile_id in sorted(entries, reverse=True)]
+
+    def _load(self, profile_id: str, content: bool) -> Optional[ProfileArtifact]:
+        if not _PROFILE_ID.match(profile_id):
+            return None
+        try:
+            self._verify()
+            with open(self._path(profile_id, "json")) as f:
+                meta = json.load(f)
+            artifact = ProfileArtifact(
+                meta["id"], meta["kind"], meta["method"], meta["path"],
+                created_at=datetime.fromisoformat(meta["created_at"]),
+                duration_ms=meta["duration_ms"],
+            )
+            if content:
+                with open(self._path(profile_id, "data"), "rb") as f:
+                    artifact.content = f.read()
+                with open(self._path(profile_id, "txt")) as f:
+                    artifact.text = f.read()
+        except FileNotFoundError:
+            return None
+        return artifact
+
+    def get(self, profile_id: str) -> Optional[ProfileArtifact]:
+        return self._load(profile_id, content=True)
+
+    def list(self) -> List[ProfileArtifact]:
+        artifacts = (self._load(profile_id, content=False) for profile_id in self._ids())
+        return [a for a in artifacts if a is not None]
+
+
+profile_store = ProfileStore()
+
+
+class _Capture:
+    """cProfile data of one request, gathered from every thread that served it."""
+
+    def __init__(self):
+        self.loop_profiler = cProfile.Profile()
+        self.thread_profiles: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+
+    def add_thread_profile(self, profiler: cProfile.Profile):
+        with self._lock:
+            self.thread_profiles.append(profiler)
+
+    def stats(self) -> pstats.Stats:
+        stats = pstats.Stats(self.loop_profiler)
+        for profiler in self.thread_profiles:
+            stats.add(profiler)
+        return stats
+
+
+def _admin_claim(headers: Headers) -> Optional[str]:
+    """Email of a bearer token claiming the admin role (checked cheaply, before any DB work)."""
+    scheme, _, token = headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    payload = decode_token(token)
+    if not payload or payload.get("role") != "admin":
+        return None
+    return payload.get("sub")
+
+
+def _is_active_admin(scope: Scope, email: str) -> bool:
+    """Resolve the user like ``deps.get_current_admin``, also requiring ``is_active``.
+
+    The role claim outlives a demotion or deactivation until the token expires.
+    """
+    app = scope.get("app")
+    overrides = getattr(app, "dependency_overrides", {})
+    sessions = overrides.get(get_db, get_db)()
+    db = next(sessions)
+    try:
+        user = db.query(User).filter(User.email == email).first()
+        return user is not None and bool(user.is_active) and user.role == Role.admin
+    finally:
+        sessions.close()
+
+
+async def _requested_profiler(scope: Scope) -> Optional[str]:
+    headers = Headers(scope=scope)
+    value = headers.get("x-profile") or QueryParams(scope.get("query_string", b"")).get("profile")
+    if not value or value.lower() in ("0", "false", "no"):
+        return None
+    email = _admin_claim(headers)
+    if email is None or not await run_in_threadpool(_is_active_admin, scope, email):
+        return None
+    if value.lower() == "pyinstrument" and PyinstrumentProfiler is not None:
+        return "pyinstrument"
+    return "cprofile"
+
+
+class ProfilingMiddleware:
+    """Capture a profile of single requests that ask for it (admins only).
+
+    Only one request is captured at a time: a profiler on the event loop thread
+    also sees whatever else runs on the loop meanwhile, so profile a quiet worker.
+    """
+
+    def __init__(self, app: ASGIApp, store: ProfileStore = profile_store) -> None:
+        self.app = app
+        self.store = store
+        self._busy = threading.Lock()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        # runs on the event loop thread only, so no lock is needed
+        sampler.requests_in_flight += 1
+        try:
+            await self._handle(scope, receive, send)
+        finally:
+            sampler.requests_in_flight -= 1
+
+    async def _handle(self, scope: Scope, receive: Receive, send: Send) -> None:
+        kind = await _requested_profiler(scope)
+        if kind is not None:
+            try:
+                self.store.prepare()
+            except OSError:
+                kind = None  # unusable PROFILE_DIR: serve the request unprofiled
+        if kind is None or not self._busy.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        artifact = ProfileArtifact(new_profile_id(), kind, scope["method"], scope["path"])
+        try:
+            if kind == "pyinstrument":
+                await self._run_pyinstrument(artifact, scope, receive, send)
+            else:
+                await self._run_cprofile(artifact, scope, receive, send)
+        finally:
+            self._busy.release()
+
+    @staticmethod
+    def _with_profile_id(artifact: ProfileArtifact, send: Send) -> Send:
+        async def send_with_profile_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=message["headers"])
+                headers["X-Profile-Id"] = artifact.id
+                headers["X-Profile-Url"] = f"/api/profiling/profiles/{artifact.id}"
+            await send(message)
+
+        return send_with_profile_id
+
+    async def _run_cprofile(self, artifact, scope, receive, send):
+        capture = _Capture()
+        started = time.perf_counter()
+        try:
+            capture.loop_profiler.enable()
+        except ValueError:
+            # 3.12+: another profiling tool (debugger, coverage) holds the slot
+            await self.app(scope, receive, send)
+            return
+        token = _current_capture.set(capture)
+        try:
+            await self.app(scope, receive, self._with_profile_id(artifact, send))
+        finally:
+            capture.loop_profiler.disable()
+            _current_capture.reset(token)
+            artifact.duration_ms = (time.perf_counter() - started) * 1000
+
+            stats = capture.stats()
+            artifact.content = marshal.dumps(stats.stats)
+            out = io.StringIO()
+            stats.stream = out
+            stats.sort_stats("cumulative").print_stats(50)
+            artifact.text = out.getvalue()
+            self.store.add(artifact)
+
+    async def _run_pyinstrument(self, artifact, scope, receive, send):
+        profiler = PyinstrumentProfiler(async_mode="enabled")
+        started = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, self._with_profile_id(artifact, send))
+        finally:
+            profiler.stop()
+            artifact.duration_ms = (time.perf_counter() - started) * 1000
+            artifact.content = profiler.output_html().encode()
+            artifact.text = profiler.output_text()
+            self.store.add(artifact)
+
+
+# ---------- route class ----------
+
+def _run_tagged(route: str, call, /, *args, **kwargs):
+    ident = threading.get_ident()
+    if sampler.running:
+        _thread_routes[ident] = route
+    capture = _current_capture.get()
+    profiler = None
+    if capture is not None and PER_THREAD_PROFILERS:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        return call(*args, **kwargs)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            capture.add_thread_profile(profiler)
+        _thread_routes.pop(ident, None)
+
+
+def tagged_endpoint(endpoint, route: str):
+    """Wrap a sync endpoint so its worker thread is tagged with the route.
+
+    The wrapper stays sync, so FastAPI keeps running the endpoint and the
+    response validation in the threadpool.
+    """
+    endpoint = getattr(endpoint, "__profiled__", endpoint)
+    if inspect.iscoroutinefunction(endpoint) or inspect.isasyncgenfunction(endpoint):
+        return endpoint
+
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        return _run_tagged(route, endpoint, *args, **kwargs)
+
+    wrapper.__profiled__ = endpoint
+    return wrapper
+
+
+def captured_endpoint(endpoint, route: str):
+    """Run a sync endpoint in the threadpool under the current capture."""
+
+    @functools.wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        return await run_in_threadpool(_run_tagged, route, endpoint, *args, **kwargs)
+
+    return wrapper
+
+
+class ProfilingRoute(APIRoute):
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, tagged_endpoint(endpoint, path), **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        endpoint = getattr(self.endpoint, "__profiled__", None)
+        if endpoint is None:
+            return handler
+
+        # a second handler, used only while a capture is active
+        stock = self.dependant
+        self.dependant = dataclasses.replace(stock, call=captured_endpoint(endpoint, self.path))
+        try:
+            capture_handler = super().get_route_handler()
+        finally:
+            self.dependant = stock
+
+        async def route_handler(request):
+            if _current_capture.get() is not None:
+                return await capture_handler(request)
+            return await handler(request)
+
+        return route_handler
+
+
+# ---------- sampling ----------
+
+def _collapse(frame) -> str:
+    names = []
+    while frame is not None and len(names) < MAX_STACK_DEPTH:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class Sampler:
+    """Low-overhead stack sampler aggregating hot stacks per route.
+
+    Samples are kept for the current window and the previous one, so a read
+    always covers between one and two windows of traffic.
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL, window: float = SAMPLE_WINDOW):
+        self.interval = interval
+        self.window = window
+        self.loop_thread_id: Optional[int] = None
+        # HTTP requests being served by this process, maintained by ProfilingMiddleware
+        self.requests_in_flight = 0
+        self._current: Dict[str, Counter] = {}
+        self._previous: Dict[str, Counter] = {}
+        self._window_started = time.monotonic()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval: Optional[float] = None, window: Optional[float] = None):
+        if interval:
+            self.interval = interval
+        if window:
+            self.window = window
+        if self.running:
+            return
+        self.loop_thread_id = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="route-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self.sample(exclude=own)
+
+    def sample(self, exclude: Optional[int] = None):
+        frames = sys._current_frames()
+        with self._lock:
+            if time.monotonic() - self._window_started >= self.window:
+                self._previous, self._current = self._current, {}
+                self._window_started = time.monotonic()
+            for ident, frame in frames.items():
+                if ident == exclude:
+                    continue
+                route = _thread_routes.get(ident)
+                if route is None:
+                    if ident != self.loop_thread_id or not self._loop_busy(frame):
+                        continue  # idle thread or idle event loop
+                    route = "<event-loop>"
+                self._current.setdefault(route, Counter())[_collapse(frame)] += 1
+
+    def _loop_busy(self, frame) -> bool:
+        """Whether the event loop thread is serving a request.
+
+        An idle uvloop has no Python frame of its own to recognise, so this
+        relies on the requests in flight: the loop counts as busy while more
+        requests are in flight than sync handlers are running in the threadpool.
+        """
+        if self.requests_in_flight <= len(_thread_routes):
+            return False
+        return not frame.f_code.co_filename.endswith("selectors.py")  # asyncio waiting for I/O
+
+    def snapshot(self) -> Dict[str, Counter]:
+        with self._lock:
+            merged: Dict[str, Counter] = {}
+            for window in (self._previous, self._current):
+                for route, stacks in window.items():
+                    merged.setdefault(route, Counter()).update(stacks)
+            return merged
+
+    def reset(self):
+        with self._lock:
+            self._current, self._previous = {}, {}
+            self._window_started = time.monotonic()
+
+
+sampler = Sampler()
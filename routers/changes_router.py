@@ -0,0 +1,99 @@
+import asyncio
+import json
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from changes import fetch_changes
+from database import get_db
+from deps import get_current_user
+from profiling import ProfilingRoute
+from models import User
+from schemas import ChangeEventOut, ChangeFeedOut
+
+router = APIRouter(prefix="/api/changes", tags=["changes"], route_class=ProfilingRoute)
+
+ENTITY_PATTERN = "^(product|order|customer)$"
+POLL_INTERVAL = 1.0
+KEEP_ALIVE_INTERVAL = 15.0
+
+
+def _require_admin(user: User):
+    if user.role.value != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+
+def _read_batch(db: Session, since: int, limit: int, entity: Optional[str]):
+    events = [ChangeEventOut.model_validate(e) for e in fetch_changes(db, since, limit, entity)]
+    # end the read transaction so a long-lived stream never blocks SQLite writers
+    db.rollback()
+    return events
+
+
+def format_sse(event: ChangeEventOut) -> str:
+    data = json.dumps(event.model_dump(mode="json"), separators=(",", ":"))
+    return f"id: {event.id}\nevent: {event.entity}.{event.op}\ndata: {data}\n\n"
+
+
+@router.get("/", response_model=ChangeFeedOut)
+def list_changes(
+    since: int = Query(0, ge=0, description="Return events with id greater than this cursor"),
+    limit: int = Query(500, ge=1, le=5000),
+    entity: Optional[str] = Query(None, pattern=ENTITY_PATTERN),
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    _require_admin(user)
+
+    # one extra row tells us whether another page exists
+    events = fetch_changes(db, since, limit + 1, entity)
+    has_more = len(events) > limit
+    events = events[:limit]
+    return {
+        "events": events,
+        "next_cursor": events[-1].id if events else since,
+        "has_more": has_more,
+    }
+
+
+async def event_stream(request: Request, db: Session, since: int, batch_size: int,
+                       entity: Optional[str], poll_interval: float = POLL_INTERVAL):
+    cursor = since
+    idle = 0.0
+    while not await request.is_disconnected():
+        events = await run_in_threadpool(_read_batch, db, cursor, batch_size, entity)
+        if events:
+            idle = 0.0
+            yield "".join(format_sse(e) for e in events)
+            cursor = events[-1].id
+            if len(events) == batch_size:
+                continue
+        elif idle >= KEEP_ALIVE_INTERVAL:
+            idle = 0.0
+            yield ": keep-alive\n\n"
+        await asyncio.sleep(poll_interval)
+        idle += poll_interval
+
+
+@router.get("/stream")
+def stream_changes(
+    request: Request,
+    since: int = Query(0, ge=0),
+    batch_size: int = Query(500, ge=1, le=5000),
+    entity: Optional[str] = Query(None, pattern=ENTITY_PATTERN),
+    last_event_id: Optional[int] = Header(None),
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """Server-Sent Events; reconnecting clients resume from ``Last-Event-ID``."""
+    _require_admin(user)
+
+    cursor = last_event_id if last_event_id is not None else since
+    return StreamingResponse(
+        event_stream(request, db, cursor, batch_size, entity),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
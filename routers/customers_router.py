@@ -6,10 +6,12 @@ from typing import List, Optional
 from database import get_db
 from models import Customer, User
 from schemas import CustomerOut
+from fieldsets import parse_fields, load_columns, sparse_response
 from deps import get_current_user
+from profiling import ProfilingRoute
 from fastapi import Body
 
-router = APIRouter(prefix="/api/customers", tags=["customers"])
+router = APIRouter(prefix="/api/customers", tags=["customers"], route_class=ProfilingRoute)
 
 
 @router.get("/", response_model=List[CustomerOut])
@@ -18,13 +20,17 @@ def list_customers(
     search: Optional[str] = Query(None, description="Search by name or email"),
     page: int = Query(1, ge=1),
     page_size: int = Query(10, le=100),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,full_name"),
     user: User = Depends(get_current_user),
 ):
 
     if user.role.value != "admin":
         raise HTTPException(status_code=403, detail="Not authorized")
 
+    selected = parse_fields(fields, CustomerOut)
     query = db.query(Customer)
+    if selected:
+        query = query.options(load_columns(Customer, selected))
 
     if search:
         query = query.filter(
@@ -35,6 +41,8 @@ def list_customers(
         )
 
     customers = query.offset((page - 1) * page_size).limit(page_size).all()
+    if selected:
+        return sparse_response(customers, selected)
     return customers
 
 
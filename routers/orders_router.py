@@ -1,12 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import case, func, select, update
 from sqlalchemy.orm import Session, selectinload
-from typing import List
-
-from models import Order, Product, User, Customer, OrderItem
-from schemas import OrderCreate, OrderOut
+from typing import List, Optional
+
+from models import Order, Product, User, Customer, OrderItem, OrderStatus, ORDER_TRANSITIONS
+from schemas import (OrderCreate, OrderOut, OrderItemOut, OrderStatusUpdate,
+                     OrderBulkStatusUpdate, OrderBulkStatusResult, OrderSummaryOut,
+                     ReconciliationIssueOut)
+from summaries import order_added, order_total_changed, order_removed, get_summary
+from changes import record_changes
+from fieldsets import parse_fields, load_columns, sparse_response
 from deps import get_db, get_current_user
+from profiling import ProfilingRoute
 
-router = APIRouter(prefix="/api/orders", tags=["orders"])
+router = APIRouter(prefix="/api/orders", tags=["orders"], route_class=ProfilingRoute)
 
 
 @router.post("/", response_model=OrderOut, status_code=status.HTTP_201_CREATED)
@@ -44,6 +51,7 @@ def create_order(payload: OrderCreate,
     )
     db.add(order)
     db.flush()
+    order_added(db, order)
 
 
     order_item = OrderItem(
@@ -69,18 +77,82 @@ def create_order(payload: OrderCreate,
 
 @router.get("/", response_model=List[OrderOut])
 def list_orders(db: Session = Depends(get_db),
-                current_user: User = Depends(get_current_user)):
-    # İlişkili öğeleri (items) her zaman yükle
-    query = db.query(Order).options(selectinload(Order.items))
+                current_user: User = Depends(get_current_user),
+                fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,total,status")):
+    selected = parse_fields(fields, OrderOut)
+    query = db.query(Order)
+    if selected:
+        query = query.options(load_columns(Order, selected))
+    # items are only loaded when they will be serialized
+    if not selected or "items" in selected:
+        query = query.options(selectinload(Order.items))
 
     if current_user.role.value == "admin":
         orders = query.all()
     else:
         orders = query.filter(Order.user_id == current_user.id).all()
 
+    if selected:
+        return sparse_response(orders, selected, nested={"items": OrderItemOut})
     return orders
 
 
+@router.get("/summary", response_model=OrderSummaryOut)
+def my_order_summary(recent: int = Query(5, ge=0, le=50),
+                     db: Session = Depends(get_db),
+                     current_user: User = Depends(get_current_user)):
+    summary = get_summary(db, current_user.id)
+    if summary is None:
+        return OrderSummaryOut()
+
+    recent_orders = []
+    if recent:
+        # served by ix_orders_user_created; items are not loaded
+        recent_orders = (
+            db.query(Order)
+            .filter(Order.user_id == current_user.id)
+            .order_by(Order.created_at.desc(), Order.id.desc())
+            .limit(recent)
+            .all()
+        )
+
+    return {
+        "order_count": summary.order_count,
+        "lifetime_total": summary.lifetime_total,
+        "last_order_at": summary.last_order_at,
+        "recent": recent_orders,
+    }
+
+
+@router.get("/reconciliation", response_model=List[ReconciliationIssueOut])
+def reconcile_orders(db: Session = Depends(get_db),
+                     current_user: User = Depends(get_current_user)):
+    """Orders whose total differs from their items, or with a line_total != unit_price * qty.
+
+    One aggregate query over integer cents; an empty list means the books balance.
+    """
+    if current_user.role.value != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    items_total = func.coalesce(func.sum(OrderItem.line_total), 0)
+    mismatched_lines = func.coalesce(func.sum(
+        case((OrderItem.line_total != OrderItem.unit_price * OrderItem.qty, 1), else_=0)
+    ), 0)
+    rows = db.execute(
+        select(Order.id, Order.total, items_total.label("items_total"), mismatched_lines.label("mismatched_lines"))
+        .outerjoin(OrderItem, OrderItem.order_id == Order.id)
+        .group_by(Order.id, Order.total)
+        .having((Order.total != items_total) | (mismatched_lines > 0))
+        .order_by(Order.id)
+    ).all()
+
+    return [
+        {"order_id": row.id, "total": row.total, "items_total": row.items_total,
+         "mismatched_lines": row.mismatched_lines}
+        for row in rows
+    ]
+
+
 @router.get("/{order_id}", response_model=OrderOut)
 def get_order(order_id: int,
               db: Session = Depends(get_db),
@@ -138,7 +210,9 @@ def update_order(order_id: int,
     db.add(order_item)
 
     product.qty_in_stock -= payload.quantity
+    old_total = order.total
     order.total = product.price * payload.quantity
+    order_total_changed(db, order, old_total)
 
     db.commit()
     db.refresh(order)
@@ -166,6 +240,99 @@ def delete_order(order_id: int,
         if product:
             product.qty_in_stock += item.qty
 
+    order_removed(db, order)
     db.delete(order)
     db.commit()
-    return None
\ No newline at end of file
+    return None
+
+
+def _restock(db: Session, order_ids: List[int]):
+    """Return the stock of all items of ``order_ids`` in one UPDATE."""
+    returned_qty = (
+        select(func.sum(OrderItem.qty))
+        .where(OrderItem.order_id.in_(order_ids), OrderItem.product_id == Product.id)
+        .scalar_subquery()
+    )
+    affected_products = select(OrderItem.product_id).where(OrderItem.order_id.in_(order_ids))
+    db.execute(
+        update(Product)
+        .where(Product.id.in_(affected_products))
+        .values(qty_in_stock=Product.qty_in_stock + returned_qty)
+        .execution_options(synchronize_session=False)
+    )
+    restocked = db.query(Product).filter(Product.id.in_(affected_products)).populate_existing().all()
+    record_changes(db, "update", restocked)
+
+
+def _transition_orders(db: Session, order_ids: List[int], target: OrderStatus) -> List[int]:
+    """Move orders to ``target`` with one guarded UPDATE; returns the ids that moved.
+
+    Orders whose current status does not allow the transition are left untouched.
+    """
+    sources = [source for source, targets in ORDER_TRANSITIONS.items() if target in targets]
+    if not sources:
+        return []
+
+    updated = db.execute(
+        update(Order)
+        .where(Order.id.in_(order_ids), Order.status.in_(sources))
+        .values(status=target)
+        .returning(Order.id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    if not updated:
+        return []
+
+    moved = db.query(Order).filter(Order.id.in_(updated)).populate_existing().all()
+    record_changes(db, "update", moved)
+    if target == OrderStatus.canceled:
+        _restock(db, updated)
+    return sorted(updated)
+
+
+@router.post("/status", response_model=OrderBulkStatusResult)
+def bulk_update_status(payload: OrderBulkStatusUpdate,
+                       db: Session = Depends(get_db),
+                       current_user: User = Depends(get_current_user)):
+    if current_user.role.value != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    target = OrderStatus(payload.status.value)
+    order_ids = list(dict.fromkeys(payload.order_ids))
+
+    updated = _transition_orders(db, order_ids, target)
+    db.commit()
+
+    moved = set(updated)
+    return {
+        "status": target.value,
+        "updated": updated,
+        "skipped": [order_id for order_id in order_ids if order_id not in moved],
+    }
+
+
+@router.post("/{order_id}/status", response_model=OrderOut)
+def update_order_status(order_id: int,
+                        payload: OrderStatusUpdate,
+                        db: Session = Depends(get_db),
+                        current_user: User = Depends(get_current_user)):
+    if current_user.role.value != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    order = db.query(Order).filter(Order.id == order_id).first()
+    if not order:
+        raise HTTPException(status_code=404, detail="Order not found")
+
+    target = OrderStatus(payload.status.value)
+    if target not in ORDER_TRANSITIONS[order.status]:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Cannot change order status from {order.status.value} to {target.value}",
+        )
+
+    if not _transition_orders(db, [order.id], target):
+        raise HTTPException(status_code=409, detail="Order status changed concurrently")
+    db.commit()
+
+    db.refresh(order)
+    return order
@@ -6,9 +6,11 @@ from typing import List, Optional
 from database import get_db
 from models import Product
 from schemas import ProductIn, ProductOut
+from fieldsets import parse_fields, load_columns, sparse_response
 from deps import get_current_user, get_current_admin
+from profiling import ProfilingRoute
 
-router = APIRouter(prefix="/api/products", tags=["products"])
+router = APIRouter(prefix="/api/products", tags=["products"], route_class=ProfilingRoute)
 
 
 @router.post("/", response_model=ProductOut, status_code=status.HTTP_201_CREATED)
@@ -42,8 +44,12 @@ def list_products(
     ordering: Optional[str] = Query(None, description="Order by field, e.g. price or -price"),
     page: int = Query(1, ge=1),
     page_size: int = Query(10, le=100),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,name,price"),
 ):
+    selected = parse_fields(fields, ProductOut)
     query = db.query(Product)
+    if selected:
+        query = query.options(load_columns(Product, selected))
 
 
     if search:
@@ -62,6 +68,8 @@ def list_products(
     total = query.count()
     products = query.offset((page - 1) * page_size).limit(page_size).all()
 
+    if selected:
+        return sparse_response(products, selected)
     return products
 
 
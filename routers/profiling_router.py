@@ -0,0 +1,92 @@
+import os
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse, Response
+
+from deps import get_current_admin
+from profiling import ProfilingRoute, profile_store, sampler
+
+router = APIRouter(
+    prefix="/api/profiling",
+    tags=["profiling"],
+    dependencies=[Depends(get_current_admin)],
+    route_class=ProfilingRoute,
+)
+
+
+@router.get("/profiles")
+def list_profiles():
+    return [
+        {
+            "id": p.id,
+            "kind": p.kind,
+            "method": p.method,
+            "path": p.path,
+            "duration_ms": round(p.duration_ms, 2),
+            "created_at": p.created_at,
+        }
+        for p in profile_store.list()
+    ]
+
+
+@router.get("/profiles/{profile_id}")
+def download_profile(profile_id: str, format: str = Query("raw", pattern="^(raw|text)$")):
+    """``raw`` is a pstats file (snakeviz, ``python -m pstats``) or pyinstrument HTML."""
+    artifact = profile_store.get(profile_id)
+    if not artifact:
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+    if format == "text":
+        return PlainTextResponse(artifact.text)
+    return Response(
+        artifact.content,
+        media_type=artifact.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{artifact.filename}"'},
+    )
+
+
+@router.post("/sampling/start")
+async def start_sampling(interval_ms: int = Query(10, ge=1, le=1000),
+                         window_s: int = Query(60, ge=1, le=3600)):
+    # async so the sampler records the event loop thread, not a threadpool worker
+    sampler.start(interval=interval_ms / 1000, window=window_s)
+    # the sampler is per process: the pid shows which worker is sampling
+    return {"running": sampler.running, "interval_ms": interval_ms, "window_s": window_s,
+            "pid": os.getpid()}
+
+
+@router.post("/sampling/stop")
+def stop_sampling():
+    sampler.stop()
+    return {"running": sampler.running, "pid": os.getpid()}
+
+
+@router.get("/sampling")
+def sampling_report(top: int = Query(10, ge=1, le=100),
+                    route: Optional[str] = None,
+                    format: str = Query("json", pattern="^(json|collapsed)$")):
+    """Hot stacks per route; ``collapsed`` is flamegraph.pl / speedscope input."""
+    stacks = sampler.snapshot()
+    if route is not None:
+        stacks = {route: stacks[route]} if route in stacks else {}
+
+    if format == "collapsed":
+        lines = [f"{name};{stack} {count}" for name, counter in stacks.items()
+                 for stack, count in counter.items()]
+        return PlainTextResponse(
+            "\n".join(lines) + "\n",
+            headers={"Content-Disposition": 'attachment; filename="stacks.collapsed"'},
+        )
+
+    return {
+        "running": sampler.running,
+        "pid": os.getpid(),
+        "routes": {
+            name: {
+                "samples": sum(counter.values()),
+                "top": [{"stack": stack, "samples": count} for stack, count in counter.most_common(top)],
+            }
+            for name, counter in stacks.items()
+        },
+    }
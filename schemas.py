@@ -1,9 +1,18 @@
-from pydantic import BaseModel, EmailStr, ConfigDict
-from typing import Optional, List
+from pydantic import BaseModel, EmailStr, ConfigDict, Field, PlainSerializer
+from typing import Optional, List, Annotated
 from datetime import datetime
+from decimal import Decimal
 from enum import Enum as PyEnum
 
 
+# Exact two-place amount; still rendered as a JSON number for existing clients.
+Money = Annotated[
+    Decimal,
+    Field(max_digits=14, decimal_places=2),
+    PlainSerializer(float, return_type=float, when_used="json"),
+]
+
+
 # ---------- AUTH SCHEMAS ----------
 
 class Role(str, PyEnum):
@@ -43,7 +52,7 @@ class ProductBase(BaseModel):
     name: str
     slug: str
     sku: str
-    price: float
+    price: Money
     qty_in_stock: int
     is_active: bool = True
 
@@ -80,18 +89,17 @@ class CustomerOut(CustomerBase):
 
 class OrderStatus(str, PyEnum):
     new = "NEW"
-    pending = "pending"
-    paid = "paid"
-    shipped = "shipped"
-    canceled = "canceled"
+    paid = "PAID"
+    shipped = "SHIPPED"
+    canceled = "CANCELED"
 
 
 class OrderItemOut(BaseModel):
     id: int
     product_id: int
     qty: int
-    unit_price: float
-    line_total: float
+    unit_price: Money
+    line_total: Money
     # Pydantic V2 Config
     model_config = ConfigDict(from_attributes=True)
 
@@ -106,7 +114,7 @@ class OrderOut(BaseModel):
     user_id: int
     customer_id: Optional[int] = None
 
-    total: float
+    total: Money
 
     status: OrderStatus
     created_at: datetime
@@ -114,4 +122,61 @@ class OrderOut(BaseModel):
     items: List[OrderItemOut] = []
 
     # Pydantic V2 Config
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+
+class OrderStatusUpdate(BaseModel):
+    status: OrderStatus
+
+
+class OrderBulkStatusUpdate(BaseModel):
+    order_ids: List[int] = Field(..., min_length=1, max_length=1000)
+    status: OrderStatus
+
+
+class OrderBulkStatusResult(BaseModel):
+    status: OrderStatus
+    updated: List[int]
+    skipped: List[int]
+
+
+class OrderBriefOut(BaseModel):
+    id: int
+    total: Money
+    status: OrderStatus
+    created_at: datetime
+    # Pydantic V2 Config
+    model_config = ConfigDict(from_attributes=True)
+
+
+class OrderSummaryOut(BaseModel):
+    order_count: int = 0
+    lifetime_total: Money = Decimal(0)
+    last_order_at: Optional[datetime] = None
+    recent: List[OrderBriefOut] = []
+
+
+class ReconciliationIssueOut(BaseModel):
+    order_id: int
+    total: Money
+    items_total: Money
+    mismatched_lines: int
+
+
+# ---------- CHANGE FEED SCHEMAS ----------
+
+class ChangeEventOut(BaseModel):
+    id: int
+    entity: str
+    entity_id: int
+    op: str
+    data: Optional[dict] = None
+    created_at: datetime
+    # Pydantic V2 Config
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ChangeFeedOut(BaseModel):
+    events: List[ChangeEventOut]
+    next_cursor: int
+    has_more: bool
@@ -0,0 +1,78 @@
+"""Production entry point.
+
+    python serve.py --workers 4 --threads 64
+
+Every option can also be set through the environment (``WEB_CONCURRENCY``,
+``THREADPOOL_SIZE``, ...), which is how the values reach the worker processes.
+Set ``PROFILE_DIR`` to a directory all workers can write to for request
+profiles; ``PROFILE_SAMPLING=1`` runs a single worker (see profiling.py).
+"""
+import argparse
+import importlib.util
+import os
+import sys
+
+import uvicorn
+
+
+def _has(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def default_workers() -> int:
+    return int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the MiniERP API")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=default_workers(),
+                        help="worker processes (default: CPU cores)")
+    parser.add_argument("--threads", type=int, default=int(os.getenv("THREADPOOL_SIZE", "40")),
+                        help="threadpool size for sync handlers in each worker")
+    parser.add_argument("--keep-alive", type=int, default=int(os.getenv("KEEP_ALIVE", "5")),
+                        help="seconds to keep idle HTTP connections open")
+    parser.add_argument("--backlog", type=int, default=int(os.getenv("BACKLOG", "2048")))
+    parser.add_argument("--graceful-timeout", type=int, default=int(os.getenv("GRACEFUL_TIMEOUT", "30")),
+                        help="seconds to wait for in-flight requests on shutdown")
+    parser.add_argument("--log-level", default=os.getenv("LOG_LEVEL", "info"))
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    workers = max(args.workers, 1)
+    if os.getenv("PROFILE_SAMPLING") == "1" and workers > 1:
+        # the sampler's stacks live in one process; with several workers the
+        # /api/profiling/sampling requests land on arbitrary ones
+        print("PROFILE_SAMPLING=1: running a single worker", file=sys.stderr)
+        workers = 1
+
+    # migrate before forking so a slow migration doesn't hold up every worker's startup
+    from database import engine
+    from migrations import prepare_database
+    prepare_database(engine)
+    engine.dispose()
+
+    # read by main.lifespan in every worker process
+    os.environ["THREADPOOL_SIZE"] = str(args.threads)
+
+    uvicorn.run(
+        "main:app",
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        loop="uvloop" if _has("uvloop") else "asyncio",
+        http="httptools" if _has("httptools") else "h11",
+        lifespan="on",
+        timeout_keep_alive=args.keep_alive,
+        backlog=args.backlog,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        log_level=args.log_level,
+        proxy_headers=True,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Per-user order summaries.
+
+The ``user_order_summaries`` row of a user is updated in the same transaction
+as the order write that changes it, so "my orders" pages can read one row
+instead of loading every order and item. Existing databases are backfilled
+by a step in ``migrations``; ``python summaries.py rebuild`` recomputes every
+row from ``orders`` to repair drift.
+"""
+import argparse
+from typing import Optional
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from models import Order, UserOrderSummary
+
+
+def _update_summary(db: Session, user_id: int, **values):
+    """Apply SQL expressions to a user's summary row, creating the row if needed.
+
+    INSERT ... ON CONFLICT DO NOTHING followed by an UPDATE with relative
+    expressions is safe when two transactions write the first order of a user
+    at the same time; neither a UNIQUE error nor a lost increment can happen.
+    """
+    db.execute(
+        sqlite_insert(UserOrderSummary)
+        .values(user_id=user_id, order_count=0, lifetime_total=0)
+        .on_conflict_do_nothing(index_elements=["user_id"])
+    )
+    db.execute(
+        update(UserOrderSummary)
+        .where(UserOrderSummary.user_id == user_id)
+        .values(**values)
+    )
+
+
+def order_added(db: Session, order: Order):
+    _update_summary(
+        db, order.user_id,
+        order_count=UserOrderSummary.order_count + 1,
+        lifetime_total=UserOrderSummary.lifetime_total + (order.total or 0),
+        # two-argument max() is SQLite's scalar max: an order committed late
+        # must not move last_order_at backwards
+        last_order_at=func.max(
+            func.coalesce(UserOrderSummary.last_order_at, order.created_at), order.created_at
+        ),
+    )
+
+
+def order_total_changed(db: Session, order: Order, old_total):
+    _update_summary(
+        db, order.user_id,
+        lifetime_total=UserOrderSummary.lifetime_total + ((order.total or 0) - (old_total or 0)),
+    )
+
+
+def order_removed(db: Session, order: Order):
+    _update_summary(
+        db, order.user_id,
+        order_count=UserOrderSummary.order_count - 1,
+        lifetime_total=UserOrderSummary.lifetime_total - (order.total or 0),
+        last_order_at=(
+            select(func.max(Order.created_at))
+            .where(Order.user_id == order.user_id, Order.id != order.id)
+            .scalar_subquery()
+        ),
+    )
+
+
+def get_summary(db: Session, user_id: int) -> Optional[UserOrderSummary]:
+    return db.get(UserOrderSummary, user_id)
+
+
+def rebuild_summaries(db: Session) -> int:
+    """Recompute every summary from ``orders`` with one INSERT ... SELECT."""
+    recompute_summaries(db)
+    db.commit()
+    return db.scalar(select(func.count()).select_from(UserOrderSummary))
+
+
+def recompute_summaries(db):
+    """Statements of ``rebuild_summaries``; ``db`` may be a Session or a Connection."""
+    db.execute(delete(UserOrderSummary))
+    aggregate = (
+        select(
+            Order.user_id,
+            func.count(Order.id),
+            func.coalesce(func.sum(Order.total), 0),
+            func.max(Order.created_at),
+        )
+        .where(Order.user_id.is_not(None))
+        .group_by(Order.user_id)
+    )
+    db.execute(
+        insert(UserOrderSummary).from_select(
+            ["user_id", "order_count", "lifetime_total", "last_order_at"], aggregate
+        )
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Maintain per-user order summaries")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.parse_args(argv)
+
+    from database import SessionLocal, engine
+    from migrations import prepare_database
+
+    prepare_database(engine)
+
+    db = SessionLocal()
+    try:
+        count = rebuild_summaries(db)
+    finally:
+        db.close()
+    print(f"Rebuilt {count} order summaries")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+import os
+import sys
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, os.pardir))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from auth import pwd_context, hash_password, create_access_token
+from database import Base, get_db
+from main import app
+from models import User, Role, Product, Order, OrderItem
+from summaries import order_added
+
+TEST_PASSWORD = "secret123"
+
+# --- Test database setup ---
+# One in-memory database per process (so per xdist worker), shared by every
+# connection through StaticPool. Each test runs inside a transaction that is
+# rolled back afterwards; commits in the routers only release a SAVEPOINT.
+engine = create_engine(
+    "sqlite://",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+
+
+@event.listens_for(engine, "connect")
+def _disable_pysqlite_transactions(dbapi_connection, connection_record):
+    # let SQLAlchemy emit BEGIN/SAVEPOINT itself (pysqlite gets them wrong)
+    dbapi_connection.isolation_level = None
+
+
+@event.listens_for(engine, "begin")
+def _begin(conn):
+    conn.exec_driver_sql("BEGIN")
+
+
+Base.metadata.create_all(bind=engine)
+
+# bcrypt at its default cost dominates the runtime of auth-heavy tests
+pwd_context.update(bcrypt__rounds=4)
+PASSWORD_HASH = hash_password(TEST_PASSWORD)
+
+
+# --- Fixtures ---
+@pytest.fixture
+def db():
+    connection = engine.connect()
+    transaction = connection.begin()
+    session = Session(bind=connection, autoflush=False, join_transaction_mode="create_savepoint")
+    try:
+        yield session
+    finally:
+        session.close()
+        transaction.rollback()
+        connection.close()
+
+
+@pytest.fixture
+def client(db):
+    def override_get_db():
+        yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+
+
+@pytest.fixture
+def make_user(db):
+    def make(email=None, role=Role.user, is_active=True):
+        user = User(
+            email=email or f"user-{uuid.uuid4().hex[:8]}@example.com",
+            password_hash=PASSWORD_HASH,
+            role=Role(role),
+            is_active=is_active,
+        )
+        db.add(user)
+        db.commit()
+        return user
+    return make
+
+
+@pytest.fixture
+def auth_headers():
+    def headers(user):
+        token = create_access_token(sub=user.email, role=user.role.value)
+        return {"Authorization": f"Bearer {token}"}
+    return headers
+
+
+@pytest.fixture
+def admin(make_user, auth_headers):
+    return auth_headers(make_user(email="admin@example.com", role=Role.admin))
+
+
+@pytest.fixture
+def buyer(make_user, auth_headers):
+    return auth_headers(make_user(email="buyer@example.com"))
+
+
+@pytest.fixture
+def make_product(db):
+    def make(price=2.5, qty_in_stock=100, **fields):
+        code = uuid.uuid4().hex[:8]
+        product = Product(
+            name=fields.pop("name", f"Product {code}"),
+            slug=fields.pop("slug", f"product-{code}"),
+            sku=fields.pop("sku", f"SKU-{code}"),
+            price=price,
+            qty_in_stock=qty_in_stock,
+            **fields,
+        )
+        db.add(product)
+        db.commit()
+        return product
+    return make
+
+
+@pytest.fixture
+def make_order(db):
+    def make(user, product, quantity=1):
+        total = product.price * quantity
+        order = Order(user_id=user.id, total=total)
+        db.add(order)
+        db.flush()
+        db.add(OrderItem(order_id=order.id, product_id=product.id, qty=quantity,
+                         unit_price=product.price, line_total=total))
+        product.qty_in_stock -= quantity
+        order_added(db, order)
+        db.commit()
+        return order
+    return make
+
+
+@pytest.fixture
+def seed_products(db):
+    """Bulk insert ``n`` products with executemany; returns their ids."""
+    def seed(n, price=2.5, qty_in_stock=1000):
+        start = (db.query(Product.id).order_by(Product.id.desc()).limit(1).scalar() or 0) + 1
+        ids = range(start, start + n)
+        db.execute(insert(Product), [
+            {"id": i, "name": f"Product {i}", "slug": f"product-{i}", "sku": f"SKU-{i}",
+             "price": price, "qty_in_stock": qty_in_stock, "is_active": True}
+            for i in ids
+        ])
+        db.commit()
+        return list(ids)
+    return seed
+
+
+@pytest.fixture
+def seed_orders(db):
+    """Bulk insert ``n`` single-product orders for ``user_id``; returns their ids.
+
+    Summaries are not maintained; call ``summaries.rebuild_summaries`` if needed.
+    """
+    def seed(user_id, product_id, n, items_per_order=1, unit_price=2.5):
+        start = (db.query(Order.id).order_by(Order.id.desc()).limit(1).scalar() or 0) + 1
+        ids = range(start, start + n)
+        created = datetime(2024, 1, 1)
+        db.execute(insert(Order), [
+            {"id": i, "user_id": user_id, "total": unit_price * items_per_order,
+             "created_at": created + timedelta(seconds=i)}
+            for i in ids
+        ])
+        db.execute(insert(OrderItem), [
+            {"order_id": i, "product_id": product_id, "qty": 1,
+             "unit_price": unit_price, "line_total": unit_price}
+            for i in ids for _ in range(items_per_order)
+        ])
+        db.commit()
+        return list(ids)
+    return seed
@@ -0,0 +1,109 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from changes import compact_changes
+from models import ChangeEvent, Product
+from routers.changes_router import event_stream
+
+
+def feed(client, headers, **params):
+    response = client.get("/api/changes/", params=params, headers=headers)
+    assert response.status_code == 200
+    return response.json()
+
+
+def ops(events):
+    return [(e["entity"], e["op"]) for e in events]
+
+
+# --- Tests ---
+def test_product_writes_are_captured(client, admin):
+    payload = {"name": "Pen", "slug": "pen", "sku": "PEN-1", "price": 1.5, "qty_in_stock": 10}
+    product_id = client.post("/api/products/", json=payload, headers=admin).json()["id"]
+    client.put(f"/api/products/{product_id}", json={**payload, "price": 2.0}, headers=admin)
+    client.delete(f"/api/products/{product_id}", headers=admin)
+
+    events = feed(client, admin, entity="product")["events"]
+    assert ops(events) == [("product", "create"), ("product", "update"), ("product", "delete")]
+    assert events[1]["data"]["price"] == 2.0
+    assert events[2]["data"] is None
+
+
+def test_order_emits_order_product_and_customer(client, admin, buyer, make_product):
+    product = make_product(qty_in_stock=5)
+    since = feed(client, admin)["next_cursor"]
+
+    client.post("/api/orders/", json={"product_id": product.id, "quantity": 2}, headers=buyer)
+
+    events = feed(client, admin, since=since)["events"]
+    assert sorted(ops(events)) == [("customer", "create"), ("order", "create"), ("product", "update")]
+    stock = [e for e in events if e["entity"] == "product"][0]
+    assert stock["data"]["qty_in_stock"] == 3
+
+
+def test_bulk_cancel_emits_events(client, admin, make_user, make_product, make_order):
+    user = make_user()
+    product = make_product(qty_in_stock=10)
+    orders = [make_order(user, product, 2).id for _ in range(2)]
+    since = feed(client, admin)["next_cursor"]
+
+    client.post("/api/orders/status", json={"order_ids": orders, "status": "CANCELED"}, headers=admin)
+
+    events = feed(client, admin, since=since)["events"]
+    assert ops(events) == [("order", "update")] * 2 + [("product", "update")]
+    assert {e["data"]["status"] for e in events[:2]} == {"CANCELED"}
+    assert events[2]["data"]["qty_in_stock"] == 10
+
+
+def test_cursor_pagination(client, admin, make_product):
+    for _ in range(5):
+        make_product()
+    first = feed(client, admin, limit=3)
+    assert len(first["events"]) == 3 and first["has_more"]
+    second = feed(client, admin, since=first["next_cursor"], limit=3)
+    assert len(second["events"]) == 2 and not second["has_more"]
+
+
+def test_feed_requires_admin(client, buyer):
+    assert client.get("/api/changes/", headers=buyer).status_code == 403
+
+
+def test_rolled_back_writes_are_not_captured(db):
+    db.add(Product(name="Pen", slug="pen", sku="PEN-1", price=1, qty_in_stock=1))
+    db.flush()
+    assert db.query(ChangeEvent).count() == 1
+
+    db.rollback()
+    assert db.query(ChangeEvent).count() == 0
+
+
+def test_compaction_keeps_latest_per_row(db, make_product):
+    product = make_product()
+    product.price = 3
+    db.commit()
+    other = make_product()
+    db.query(ChangeEvent).update({ChangeEvent.created_at: datetime.utcnow() - timedelta(days=30)})
+    db.commit()
+
+    assert compact_changes(db, retention=timedelta(days=7)) == 1
+    remaining = [(e.entity_id, e.op) for e in db.query(ChangeEvent).order_by(ChangeEvent.id)]
+    assert remaining == [(product.id, "update"), (other.id, "create")]
+
+
+def test_event_stream(db, make_product):
+    product = make_product()
+
+    class Request:
+        calls = 0
+
+        async def is_disconnected(self):
+            self.calls += 1
+            return self.calls > 1
+
+    async def collect():
+        return [chunk async for chunk in event_stream(Request(), db, 0, 100, None, poll_interval=0)]
+
+    chunks = asyncio.run(collect())
+    assert len(chunks) == 1
+    assert chunks[0].startswith("id: 1\nevent: product.create\ndata: {")
+    assert f'"entity_id":{product.id}' in chunks[0]
@@ -0,0 +1,101 @@
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from compression import CompressionMiddleware, negotiate_encoding
+from fieldsets import parse_fields
+from schemas import ProductOut
+
+app = FastAPI()
+app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+
+@app.get("/big")
+def big():
+    return PlainTextResponse("x" * 5000)
+
+
+@app.get("/small")
+def small():
+    return PlainTextResponse("x" * 10)
+
+
+@app.get("/stream")
+def stream():
+    def chunks():
+        for _ in range(10):
+            yield b"y" * 1000
+    return StreamingResponse(chunks(), media_type="text/plain")
+
+
+client = TestClient(app)
+
+
+# --- Negotiation ---
+def test_negotiate_prefers_server_order():
+    assert negotiate_encoding("gzip, br, zstd", ["zstd", "br", "gzip"]) == "zstd"
+
+
+def test_negotiate_honours_q_values():
+    assert negotiate_encoding("gzip;q=1.0, br;q=0.5", ["br", "gzip"]) == "gzip"
+    assert negotiate_encoding("br;q=0, gzip;q=0", ["br", "gzip"]) is None
+
+
+def test_negotiate_wildcard_and_identity():
+    assert negotiate_encoding("*", ["gzip"]) == "gzip"
+    assert negotiate_encoding("identity", ["gzip"]) is None
+
+
+# --- Middleware ---
+def test_gzip_large_response():
+    response = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.text == "x" * 5000
+
+
+def test_small_response_not_compressed():
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.text == "x" * 10
+
+
+def test_streaming_response_compressed():
+    response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.content == b"y" * 10000
+
+
+def test_brotli_when_available():
+    pytest.importorskip("brotli")
+    response = client.get("/big", headers={"Accept-Encoding": "br"})
+    assert response.headers["content-encoding"] == "br"
+
+
+# --- Sparse fieldsets ---
+def test_parse_fields_adds_id():
+    assert parse_fields("name,price", ProductOut) == ["id", "name", "price"]
+
+
+def test_parse_fields_none():
+    assert parse_fields(None, ProductOut) is None
+
+
+def test_parse_fields_unknown():
+    with pytest.raises(HTTPException) as exc:
+        parse_fields("name,password", ProductOut)
+    assert exc.value.status_code == 400
+
+
+def test_parse_fields_empty_list():
+    with pytest.raises(HTTPException) as exc:
+        parse_fields(",", ProductOut)
+    assert exc.value.status_code == 400
+
+
+def test_zstd_when_available():
+    pytest.importorskip("zstandard")
+    response = client.get("/big", headers={"Accept-Encoding": "zstd"})
+    assert response.headers["content-encoding"] == "zstd"
+    # httpx decodes zstd itself when zstandard is installed
+    assert response.content == b"x" * 5000
@@ -0,0 +1,67 @@
+import pytest
+from sqlalchemy import event
+
+from models import Customer
+
+
+@pytest.fixture
+def statements(db):
+    """SQL statements executed while the test runs."""
+    engine = db.get_bind().engine
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append(statement)
+
+    event.listen(engine, "before_cursor_execute", capture)
+    yield captured
+    event.remove(engine, "before_cursor_execute", capture)
+
+
+# --- Tests ---
+def test_product_fields_narrow_select(client, make_product, statements):
+    make_product(name="Pen", price=1.5)
+    statements.clear()
+
+    response = client.get("/api/products/?fields=name,price")
+    assert response.status_code == 200
+    assert response.json() == [{"id": 1, "name": "Pen", "price": 1.5}]
+
+    select_sql = [s for s in statements if s.startswith("SELECT") and "FROM products" in s][-1]
+    assert "products.price" in select_sql
+    assert "products.sku" not in select_sql and "products.qty_in_stock" not in select_sql
+
+
+def test_empty_fieldset_rejected(client):
+    assert client.get("/api/products/?fields=,").status_code == 400
+
+
+def test_customer_fields(client, db, admin):
+    db.add(Customer(full_name="Ada Lovelace", email="ada@example.com", phone="123"))
+    db.commit()
+
+    response = client.get("/api/customers/?fields=full_name", headers=admin)
+    assert response.status_code == 200
+    assert [set(row) for row in response.json()] == [{"id", "full_name"}]
+
+
+def test_order_fields_skip_items(client, make_user, auth_headers, make_product, make_order, statements):
+    user = make_user()
+    order = make_order(user, make_product(), 2)
+    statements.clear()
+
+    response = client.get("/api/orders/?fields=total,status", headers=auth_headers(user))
+    assert response.status_code == 200
+    assert response.json() == [{"id": order.id, "total": 5.0, "status": "NEW"}]
+    assert not any("FROM order_items" in s for s in statements)
+
+
+def test_order_fields_with_items(client, make_user, auth_headers, make_product, make_order):
+    user = make_user()
+    order = make_order(user, make_product(), 2)
+
+    response = client.get("/api/orders/?fields=items", headers=auth_headers(user))
+    row = response.json()[0]
+    assert set(row) == {"id", "items"}
+    assert row["id"] == order.id
+    assert [item["qty"] for item in row["items"]] == [2]
@@ -0,0 +1,99 @@
+from decimal import Decimal
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from database import Base
+import main
+from migrations import MIGRATIONS, run_migrations
+from models import OrderItem, Product
+from money import to_minor, from_minor
+
+
+def test_minor_unit_conversion():
+    assert to_minor(Decimal("19.99")) == 1999
+    assert to_minor(0.1) == 10
+    assert to_minor("2.005") == 201
+    assert from_minor(1999) == Decimal("19.99")
+    assert from_minor(250.0) == Decimal("2.50")
+
+
+def test_order_totals_are_exact(client, db, buyer, make_product):
+    product = make_product(price=Decimal("0.10"))
+    response = client.post("/api/orders/", json={"product_id": product.id, "quantity": 3}, headers=buyer)
+    assert response.status_code == 201
+    assert response.json()["total"] == 0.3
+
+    item = db.query(OrderItem).filter(OrderItem.order_id == response.json()["id"]).one()
+    assert item.line_total == Decimal("0.30")
+
+
+def test_price_with_sub_cent_precision_rejected(client, admin):
+    payload = {"name": "Pen", "slug": "pen", "sku": "PEN-1", "price": 1.999, "qty_in_stock": 1}
+    response = client.post("/api/products/", json=payload, headers=admin)
+    assert response.status_code == 422
+
+
+def test_reconciliation(client, db, admin, make_user, make_product, make_order):
+    user = make_user()
+    product = make_product(price=Decimal("4.99"))
+    good = make_order(user, product, 2)
+    bad = make_order(user, product, 1)
+    assert client.get("/api/orders/reconciliation", headers=admin).json() == []
+
+    bad.total = Decimal("5.00")
+    db.commit()
+    response = client.get("/api/orders/reconciliation", headers=admin)
+    assert response.json() == [
+        {"order_id": bad.id, "total": 5.0, "items_total": 4.99, "mismatched_lines": 0}
+    ]
+    assert good.id not in [row["order_id"] for row in response.json()]
+
+
+def test_legacy_float_columns_migrated(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE products (id INTEGER PRIMARY KEY, price FLOAT NOT NULL)")
+        conn.exec_driver_sql("INSERT INTO products (id, price) VALUES (1, 19.99), (2, 0.1)")
+
+    assert run_migrations(engine) == len(MIGRATIONS)
+    assert run_migrations(engine) == 0
+
+    with engine.connect() as conn:
+        prices = conn.execute(text("SELECT price FROM products ORDER BY id")).scalars().all()
+    assert [from_minor(p) for p in prices] == [Decimal("19.99"), Decimal("0.10")]
+
+
+def test_new_database_not_migrated_twice(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as db:
+        db.add(Product(id=1, name="Pen", sku="PEN-1", price=Decimal("1.25"), qty_in_stock=1))
+        db.commit()
+
+    run_migrations(engine)
+
+    with Session(engine) as db:
+        assert db.get(Product, 1).price == Decimal("1.25")
+
+
+def test_app_startup_migrates_legacy_database(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "CREATE TABLE products (id INTEGER PRIMARY KEY, name VARCHAR NOT NULL, slug VARCHAR, "
+            "sku VARCHAR NOT NULL UNIQUE, price FLOAT NOT NULL, qty_in_stock INTEGER NOT NULL, "
+            "is_active BOOLEAN)"
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO products VALUES (1, 'Pen', 'pen', 'PEN-1', 19.99, 5, 1)"
+        )
+    monkeypatch.setattr(main, "engine", engine)
+
+    main.warm_up()
+
+    with Session(engine) as db:
+        assert db.get(Product, 1).price == Decimal("19.99")
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA user_version").scalar() == len(MIGRATIONS)
+    engine.dispose()
@@ -0,0 +1,66 @@
+import pytest
+
+from models import Product
+
+
+@pytest.fixture
+def product(make_product):
+    return make_product(price=2.5, qty_in_stock=100).id
+
+
+def stock(db, product_id):
+    db.expire_all()
+    return db.get(Product, product_id).qty_in_stock
+
+
+def place_order(client, headers, product_id, quantity):
+    response = client.post("/api/orders/", json={"product_id": product_id, "quantity": quantity}, headers=headers)
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+# --- Tests ---
+def test_single_transition(client, admin, buyer, product):
+    order_id = place_order(client, buyer, product, 2)
+    response = client.post(f"/api/orders/{order_id}/status", json={"status": "PAID"}, headers=admin)
+    assert response.status_code == 200
+    assert response.json()["status"] == "PAID"
+
+
+def test_invalid_transition_rejected(client, admin, buyer, product):
+    order_id = place_order(client, buyer, product, 2)
+    response = client.post(f"/api/orders/{order_id}/status", json={"status": "SHIPPED"}, headers=admin)
+    assert response.status_code == 400
+
+
+def test_status_change_requires_admin(client, buyer, product):
+    order_id = place_order(client, buyer, product, 2)
+    response = client.post(f"/api/orders/{order_id}/status", json={"status": "PAID"}, headers=buyer)
+    assert response.status_code == 403
+
+
+def test_bulk_ship_skips_ineligible(client, admin, buyer, product):
+    paid = [place_order(client, buyer, product, 1) for _ in range(3)]
+    new = place_order(client, buyer, product, 1)
+    client.post("/api/orders/status", json={"order_ids": paid, "status": "PAID"}, headers=admin)
+
+    response = client.post("/api/orders/status", json={"order_ids": paid + [new, 999], "status": "SHIPPED"},
+                           headers=admin)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["updated"] == sorted(paid)
+    assert data["skipped"] == [new, 999]
+
+
+def test_bulk_cancel_restocks_once(client, db, admin, buyer, product):
+    orders = [place_order(client, buyer, product, 5) for _ in range(4)]
+    assert stock(db, product) == 80
+
+    response = client.post("/api/orders/status", json={"order_ids": orders, "status": "CANCELED"}, headers=admin)
+    assert response.json()["updated"] == sorted(orders)
+    assert stock(db, product) == 100
+
+    # canceling again is a no-op and must not restock twice
+    response = client.post("/api/orders/status", json={"order_ids": orders, "status": "CANCELED"}, headers=admin)
+    assert response.json()["updated"] == []
+    assert stock(db, product) == 100
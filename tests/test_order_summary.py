@@ -0,0 +1,100 @@
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from migrations import backfill_order_summaries
+from models import Order, UserOrderSummary
+from summaries import order_added, rebuild_summaries
+
+
+@pytest.fixture
+def product(make_product):
+    return make_product(price=2.5, qty_in_stock=100).id
+
+
+def place_order(client, headers, product_id, quantity):
+    response = client.post("/api/orders/", json={"product_id": product_id, "quantity": quantity}, headers=headers)
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+# --- Tests ---
+def test_summary_empty(client, buyer):
+    response = client.get("/api/orders/summary", headers=buyer)
+    assert response.status_code == 200
+    assert response.json() == {"order_count": 0, "lifetime_total": 0, "last_order_at": None, "recent": []}
+
+
+def test_summary_tracks_create_update_delete(client, buyer, product):
+    first = place_order(client, buyer, product, 2)
+    second = place_order(client, buyer, product, 4)
+
+    data = client.get("/api/orders/summary", headers=buyer).json()
+    assert data["order_count"] == 2
+    assert data["lifetime_total"] == 15.0
+    assert [order["id"] for order in data["recent"]] == [second, first]
+
+    client.put(f"/api/orders/{first}", json={"product_id": product, "quantity": 1}, headers=buyer)
+    assert client.get("/api/orders/summary", headers=buyer).json()["lifetime_total"] == 12.5
+
+    client.delete(f"/api/orders/{second}", headers=buyer)
+    data = client.get("/api/orders/summary?recent=1", headers=buyer).json()
+    assert data["order_count"] == 1
+    assert data["lifetime_total"] == 2.5
+    assert [order["id"] for order in data["recent"]] == [first]
+
+
+def test_rebuild_matches_incremental(client, db, buyer, admin, product):
+    for quantity in (1, 2, 3):
+        place_order(client, buyer, product, quantity)
+    place_order(client, admin, product, 5)
+    before = client.get("/api/orders/summary", headers=buyer).json()
+
+    assert rebuild_summaries(db) == 2
+
+    assert client.get("/api/orders/summary", headers=buyer).json() == before
+
+
+def test_first_order_when_row_already_exists(db, make_user, make_product, make_order):
+    user = make_user()
+    # a concurrent transaction created the row first
+    db.add(UserOrderSummary(user_id=user.id, order_count=0, lifetime_total=0))
+    db.commit()
+
+    make_order(user, make_product(price=2.5), 2)
+
+    db.expire_all()
+    summary = db.get(UserOrderSummary, user.id)
+    assert (summary.order_count, summary.lifetime_total) == (1, Decimal("5.00"))
+
+
+def test_last_order_at_when_older_order_applied_last(db, make_user, make_product):
+    user = make_user()
+    product = make_product(price=2.5)
+    newer = Order(user_id=user.id, total=product.price, created_at=datetime(2024, 5, 2, 12, 0))
+    older = Order(user_id=user.id, total=product.price, created_at=datetime(2024, 5, 1, 12, 0))
+    db.add_all([newer, older])
+    db.flush()
+    # the older order's transaction commits after the newer one's
+    order_added(db, newer)
+    order_added(db, older)
+    db.commit()
+
+    db.expire_all()
+    summary = db.get(UserOrderSummary, user.id)
+    assert summary.order_count == 2
+    assert summary.last_order_at == datetime(2024, 5, 2, 12, 0)
+
+
+def test_migration_backfills_existing_orders(client, db, make_user, auth_headers, make_product, seed_orders):
+    user = make_user()
+    seed_orders(user.id, make_product().id, 3)
+    assert client.get("/api/orders/summary", headers=auth_headers(user)).json()["order_count"] == 0
+
+    backfill_order_summaries(db.connection())
+    db.commit()
+
+    data = client.get("/api/orders/summary", headers=auth_headers(user)).json()
+    assert data["order_count"] == 3
+    assert data["lifetime_total"] == 7.5
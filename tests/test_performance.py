@@ -0,0 +1,30 @@
+import time
+
+import pytest
+
+from summaries import rebuild_summaries
+
+pytestmark = pytest.mark.perf
+
+
+def test_seed_100k_products(client, seed_products):
+    started = time.perf_counter()
+    ids = seed_products(100_000)
+    elapsed = time.perf_counter() - started
+    assert len(ids) == 100_000
+    assert elapsed < 30
+
+    response = client.get("/api/products/?ordering=-id&page_size=5&fields=id,price")
+    assert [row["id"] for row in response.json()] == ids[::-1][:5]
+
+
+def test_summary_over_100k_orders(client, db, make_user, auth_headers, make_product, seed_orders):
+    user = make_user()
+    product = make_product()
+    seed_orders(user.id, product.id, 100_000)
+    rebuild_summaries(db)
+
+    response = client.get("/api/orders/summary?recent=3", headers=auth_headers(user))
+    data = response.json()
+    assert data["order_count"] == 100_000
+    assert len(data["recent"]) == 3
@@ -0,0 +1,205 @@
+import cProfile
+import marshal
+import os
+import stat
+import threading
+import time
+
+import pytest
+from sqlalchemy import event
+
+from models import Role
+from profiling import ProfileArtifact, ProfileStore, new_profile_id, profile_store, sampler
+
+
+@pytest.fixture(autouse=True)
+def profile_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(profile_store, "directory", str(tmp_path / "profiles"))
+    return profile_store.directory
+
+
+@pytest.fixture
+def stopped_sampler():
+    sampler.reset()
+    yield sampler
+    sampler.stop()
+    sampler.reset()
+
+
+# --- Tests ---
+def test_profile_capture_for_admin(client, admin, make_product):
+    make_product()
+    response = client.get("/api/products/", headers={**admin, "X-Profile": "1"})
+    assert response.status_code == 200
+    profile_id = response.headers["x-profile-id"]
+
+    download = client.get(f"/api/profiling/profiles/{profile_id}", headers=admin)
+    assert download.status_code == 200
+    assert "attachment" in download.headers["content-disposition"]
+    stats = marshal.loads(download.content)
+    # the sync handler ran in a worker thread and must still show up
+    assert any(func == "list_products" for _, _, func in stats)
+
+    text = client.get(f"/api/profiling/profiles/{profile_id}?format=text", headers=admin).text
+    assert "cumulative" in text
+
+
+def test_profiles_shared_between_workers(profile_dir):
+    # each worker process has its own ProfileStore over the same directory
+    worker, other_worker = ProfileStore(profile_dir, size=2), ProfileStore(profile_dir, size=2)
+    ids = []
+    for _ in range(3):
+        artifact = ProfileArtifact(new_profile_id(), "cprofile", "GET", "/api/products/")
+        artifact.content, artifact.text = b"stats", "report"
+        worker.add(artifact)
+        ids.append(artifact.id)
+
+    assert [p.id for p in other_worker.list()] == ids[:0:-1]
+    assert other_worker.get(ids[0]) is None
+    stored = other_worker.get(ids[-1])
+    assert (stored.content, stored.text, stored.path) == (b"stats", "report", "/api/products/")
+    assert other_worker.get("../../etc/passwd") is None
+
+
+def test_profile_dir_is_private(profile_dir, tmp_path):
+    store = ProfileStore(profile_dir)
+    store.prepare()
+    assert stat.S_IMODE(os.stat(profile_dir).st_mode) == 0o700
+
+    shared = tmp_path / "shared"
+    shared.mkdir()
+    shared.chmod(0o777)
+    with pytest.raises(PermissionError):
+        ProfileStore(str(shared)).prepare()
+
+    planted = tmp_path / "planted"
+    planted.symlink_to(profile_dir)
+    with pytest.raises(PermissionError):
+        ProfileStore(str(planted)).list()
+
+
+def test_profile_request_with_unusable_profile_dir(client, admin, profile_dir):
+    os.makedirs(profile_dir, mode=0o777)
+    os.chmod(profile_dir, 0o777)
+
+    response = client.get("/api/auth/me", headers={**admin, "X-Profile": "1"})
+    assert response.status_code == 200
+    assert "x-profile-id" not in response.headers
+
+
+def test_profile_request_while_another_profiler_is_active(client, admin, make_product):
+    # from Python 3.12 a second cProfile can't be enabled; the request is served unprofiled
+    make_product()
+    outer = cProfile.Profile()
+    outer.enable()
+    try:
+        response = client.get("/api/products/", headers={**admin, "X-Profile": "1"})
+    finally:
+        outer.disable()
+    assert response.status_code == 200
+    assert len(response.json()) == 1
+
+
+def test_unprofiled_response_validation_runs_in_threadpool(client, db, admin, make_user, make_product,
+                                                           make_order):
+    order = make_order(make_user(), make_product())
+    engine = db.get_bind().engine
+    threads = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if "FROM order_items" in statement:
+            threads.append(threading.current_thread().name)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        response = client.post(f"/api/orders/{order.id}/status", json={"status": "PAID"}, headers=admin)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert response.status_code == 200
+    # OrderOut lazy-loads the items while the response is validated
+    assert threads and all(name == "AnyIO worker thread" for name in threads)
+
+
+def test_profile_flag_ignored_for_non_admin(client, buyer):
+    response = client.get("/api/auth/me", headers={**buyer, "X-Profile": "1"})
+    assert response.status_code == 200
+    assert "x-profile-id" not in response.headers
+
+
+@pytest.mark.parametrize("change", [{"is_active": False}, {"role": Role.user}])
+def test_profile_flag_ignored_for_deactivated_or_demoted_admin(client, db, make_user, auth_headers, change):
+    user = make_user(role=Role.admin)
+    headers = auth_headers(user)  # issued while the user was an active admin
+    for field, value in change.items():
+        setattr(user, field, value)
+    db.commit()
+
+    response = client.get("/api/auth/me", headers={**headers, "X-Profile": "1"})
+    assert response.status_code == 200
+    assert "x-profile-id" not in response.headers
+
+
+def test_profiling_endpoints_require_admin(client, buyer):
+    assert client.get("/api/profiling/profiles", headers=buyer).status_code == 403
+
+
+def test_sampler_attributes_stacks_to_routes(stopped_sampler):
+    from profiling import _run_tagged
+
+    def busy():
+        deadline = time.monotonic() + 0.2
+        while time.monotonic() < deadline:
+            pass
+
+    stopped_sampler.start(interval=0.005, window=60)
+    worker = threading.Thread(target=_run_tagged, args=("/api/orders/", busy))
+    worker.start()
+    worker.join()
+
+    stacks = stopped_sampler.snapshot()
+    assert "/api/orders/" in stacks
+    assert any("busy" in stack for stack in stacks["/api/orders/"])
+
+
+def test_sampler_skips_idle_event_loop(stopped_sampler, monkeypatch):
+    from profiling import _thread_routes
+
+    stop = threading.Event()
+
+    def spin():  # stands in for a loop thread whose idle frame isn't recognisable (uvloop)
+        while not stop.is_set():
+            pass
+
+    loop = threading.Thread(target=spin)
+    loop.start()
+    try:
+        monkeypatch.setattr(stopped_sampler, "loop_thread_id", loop.ident)
+        stopped_sampler.sample()
+        assert "<event-loop>" not in stopped_sampler.snapshot()
+
+        # one request in flight, but its sync handler runs in the threadpool
+        monkeypatch.setattr(stopped_sampler, "requests_in_flight", 1)
+        monkeypatch.setitem(_thread_routes, -1, "/api/orders/")
+        stopped_sampler.sample()
+        assert "<event-loop>" not in stopped_sampler.snapshot()
+
+        monkeypatch.delitem(_thread_routes, -1)
+        stopped_sampler.sample()
+        assert any("spin" in stack for stack in stopped_sampler.snapshot()["<event-loop>"])
+    finally:
+        stop.set()
+        loop.join()
+
+
+def test_sampling_report(client, admin, stopped_sampler):
+    assert client.post("/api/profiling/sampling/start?interval_ms=5", headers=admin).json()["running"]
+    client.get("/api/products/", headers=admin)
+    assert stopped_sampler.requests_in_flight == 0
+
+    report = client.get("/api/profiling/sampling", headers=admin).json()
+    assert report["running"]
+    collapsed = client.get("/api/profiling/sampling?format=collapsed", headers=admin)
+    assert collapsed.status_code == 200
+
+    assert client.post("/api/profiling/sampling/stop", headers=admin).json()["running"] is False
@@ -0,0 +1,98 @@
+import os
+import threading
+
+import anyio.to_thread
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.pool import StaticPool
+
+import main
+import migrations
+import serve
+from migrations import MIGRATIONS, prepare_database
+from profiling import sampler
+
+
+def test_lifespan_sizes_threadpool_and_disposes_engine(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    disposed = []
+    monkeypatch.setattr(engine, "dispose", lambda: disposed.append(True))
+    monkeypatch.setattr(main, "engine", engine)
+    monkeypatch.setattr(main, "THREADPOOL_SIZE", 7)
+    monkeypatch.setattr(main, "PROFILE_SAMPLING", True)
+
+    with TestClient(main.app) as client:
+        limiter = client.portal.call(anyio.to_thread.current_default_thread_limiter)
+        assert limiter.total_tokens == 7
+        assert "products" in inspect(engine).get_table_names()
+        assert sampler.running
+        assert disposed == []
+
+    assert not sampler.running
+    assert disposed == [True]
+
+
+def test_serve_options_default_from_environment(monkeypatch):
+    monkeypatch.setenv("WEB_CONCURRENCY", "3")
+    monkeypatch.setenv("THREADPOOL_SIZE", "64")
+    monkeypatch.setenv("KEEP_ALIVE", "15")
+
+    args = serve.parse_args([])
+    assert (args.workers, args.threads, args.keep_alive) == (3, 64, 15)
+    assert serve.parse_args(["--workers", "2", "--threads", "8"]).workers == 2
+
+
+def test_serve_passes_threads_to_workers(monkeypatch):
+    calls = []
+    monkeypatch.setenv("THREADPOOL_SIZE", "40")
+    monkeypatch.setattr(migrations, "prepare_database", lambda engine: calls.append("prepare"))
+    monkeypatch.setattr(serve.uvicorn, "run", lambda app, **options: calls.append((app, options)))
+
+    serve.main(["--workers", "0", "--threads", "16"])
+
+    assert calls[0] == "prepare"
+    app, options = calls[1]
+    assert app == "main:app"
+    assert options["workers"] == 1
+    assert os.environ["THREADPOOL_SIZE"] == "16"
+
+
+def test_concurrent_workers_prepare_database_once(tmp_path):
+    url = f"sqlite:///{tmp_path / 'fresh.db'}"
+    workers = 8
+    barrier = threading.Barrier(workers)
+    applied, errors = [], []
+
+    def start_worker():
+        engine = create_engine(url)
+        barrier.wait()
+        try:
+            applied.append(prepare_database(engine))
+        except Exception as exc:  # pragma: no cover - reported below
+            errors.append(exc)
+        finally:
+            engine.dispose()
+
+    threads = [threading.Thread(target=start_worker) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert sorted(applied) == [0] * (workers - 1) + [len(MIGRATIONS)]
+    engine = create_engine(url)
+    assert "products" in inspect(engine).get_table_names()
+    engine.dispose()
+
+
+def test_serve_runs_one_worker_when_sampling(monkeypatch):
+    runs = []
+    monkeypatch.setenv("PROFILE_SAMPLING", "1")
+    monkeypatch.setenv("THREADPOOL_SIZE", "40")
+    monkeypatch.setattr(migrations, "prepare_database", lambda engine: None)
+    monkeypatch.setattr(serve.uvicorn, "run", lambda app, **options: runs.append(options))
+
+    serve.main(["--workers", "4"])
+
+    assert runs[0]["workers"] == 1